@@ -1,20 +1,37 @@
 #!/usr/bin/env python3
-import os, sys, time, glob, shutil, subprocess, threading
+import io, os, sys, time, zlib, queue, shutil, ctypes, fnmatch, hashlib, subprocess, threading
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime
 
 import pyautogui
 from PIL import Image, ImageQt
 
-from PySide6.QtCore import Qt, QTimer, QSize, QRect
-from PySide6.QtGui import QPixmap, QPainter, QPen
+from PySide6.QtCore import Qt, QTimer, QSize, QRectF
+from PySide6.QtGui import QPixmap, QPainter, QPen, QTransform
 from PySide6.QtWidgets import (
     QApplication, QMainWindow, QWidget, QLabel, QPushButton,
     QVBoxLayout, QHBoxLayout, QGroupBox, QCheckBox, QLineEdit,
     QSpinBox, QMessageBox
 )
 
-# macOS Quartz for key state polling
-from Quartz import CGEventSourceKeyState, kCGEventSourceStateCombinedSessionState
+# macOS Quartz for hotkeys (event tap, key-state polling fallback) and direct region capture
+from Quartz import (
+    CGEventSourceKeyState, kCGEventSourceStateCombinedSessionState,
+    CGEventTapCreate, CGEventTapEnable, CGEventMaskBit, CGEventGetIntegerValueField,
+    kCGSessionEventTap, kCGHeadInsertEventTap, kCGEventTapOptionListenOnly,
+    kCGEventKeyDown, kCGEventTapDisabledByTimeout, kCGEventTapDisabledByUserInput,
+    kCGKeyboardEventKeycode, kCGKeyboardEventAutorepeat,
+    CFMachPortCreateRunLoopSource, CFRunLoopAddSource, CFRunLoopGetCurrent, kCFRunLoopCommonModes,
+    CGDisplayCreateImageForRect, CGMainDisplayID, CGRectMake,
+    CGImageGetWidth, CGImageGetHeight, CGImageGetBytesPerRow,
+    CGImageGetBitsPerPixel, CGImageGetBitsPerComponent, CGImageGetBitmapInfo,
+    kCGBitmapByteOrderMask, kCGBitmapByteOrder32Little, kCGBitmapAlphaInfoMask,
+    kCGBitmapFloatComponents, kCGImageAlphaNoneSkipFirst, kCGImageAlphaPremultipliedFirst,
+    kCGImageAlphaFirst,
+    CGImageGetDataProvider, CGDataProviderCopyData,
+    CGEventCreate, CGEventGetLocation, CGEventCreateMouseEvent, CGEventPost,
+    kCGEventMouseMoved, kCGMouseButtonLeft, kCGHIDEventTap,
+)
 
 # --- NEW: macOS power/activity controls (PyObjC Foundation) ---
 try:
@@ -30,13 +47,57 @@ except Exception:
     _FOUNDATION_OK = False
 # ---------------------------------------------------------------
 
+# In-process app activation (PyObjC AppKit); `open -a` is the fallback
+try:
+    from AppKit import NSWorkspace, NSApplicationActivateIgnoringOtherApps
+    _APPKIT_OK = True
+except Exception:
+    _APPKIT_OK = False
+
+# IOKit power assertions (held for a whole capture run)
+try:
+    import objc
+    _IOKIT = {}
+    objc.loadBundleFunctions(
+        objc.loadBundle("IOKit", {}, bundle_path="/System/Library/Frameworks/IOKit.framework"),
+        _IOKIT,
+        [("IOPMAssertionCreateWithName", b"i@I@o^I"), ("IOPMAssertionRelease", b"iI")],
+    )
+    _IOKIT_OK = len(_IOKIT) == 2
+except Exception:
+    _IOKIT_OK = False
+
+# Fast non-cryptographic hash for page signatures (blake2b fallback)
+try:
+    import xxhash
+    _XXHASH_OK = True
+except Exception:
+    _XXHASH_OK = False
+
+# libspng-backed PNG encoder (Pillow fallback)
+try:
+    import numpy as np
+    import pyspng
+    _PYSPNG_OK = True
+except Exception:
+    _PYSPNG_OK = False
+
 pyautogui.FAILSAFE = True
+# the capture loop paces itself with explicit sleeps; skip pyautogui's 0.1 s per-call pause
+pyautogui.PAUSE = 0
 
 # ----- mac virtual keycodes for function keys -----
 VK_F6 = 97
 VK_F7 = 98
 VK_F8 = 100
 
+IMG_EXTS = {".png", ".jpg", ".jpeg", ".tif", ".tiff"}
+
+# duplicate-page signatures: every SIG_STEP-th row/pixel of the raw capture,
+# or a SIG_SIZE grayscale thumbnail when the frame came from pyautogui
+SIG_STEP = 8
+SIG_SIZE = (32, 32)
+
 # ------------------ helpers ------------------
 def ensure_dirs():
     root_dir = os.path.join(os.getcwd(), "bookraw")
@@ -46,37 +107,263 @@ def ensure_dirs():
     return root_dir, pdf_root
 
 def img_list_sorted_ctime(folder, pattern="page_*.png"):
-    files = [f for f in glob.glob(os.path.join(folder, pattern))
-             if os.path.splitext(f)[1].lower() in {".png", ".jpg", ".jpeg", ".tif", ".tiff"}]
-    def times(p):
-        st = os.stat(p)
-        birth = getattr(st, "st_birthtime", None)
-        mtime = st.st_mtime
-        return (birth if birth else mtime, mtime, os.path.basename(p).lower())
-    return sorted(files, key=times)
-
-def make_pdf_from_folder(folder, out_pdf_path, pattern="page_*.png"):
-    files = img_list_sorted_ctime(folder, pattern)
+    # one directory read; the sort key is built once per entry
+    keyed = []
+    # as with glob, wildcards don't match a leading dot (e.g. macOS "._page_0001.png" files)
+    hidden_ok = pattern.startswith(".")
+    with os.scandir(folder) as it:
+        for e in it:
+            if not fnmatch.fnmatch(e.name, pattern) or not e.is_file():
+                continue
+            if e.name.startswith(".") and not hidden_ok:
+                continue
+            if os.path.splitext(e.name)[1].lower() not in IMG_EXTS:
+                continue
+            st = e.stat()
+            birth = getattr(st, "st_birthtime", None)
+            keyed.append(((birth if birth else st.st_mtime, st.st_mtime, e.name.lower()), e.path))
+    keyed.sort()
+    return [p for _, p in keyed]
+
+def _img2pdf_inputs(img2pdf, files):
+    """Inputs for a retry after img2pdf rejected the batch: pages it accepts pass through
+    untouched, pages it rejects (e.g. alpha channel) are re-encoded alone as RGB PNG."""
+    inputs = []
+    for p in files:
+        try:
+            img2pdf.convert(p)
+            inputs.append(p)
+            continue
+        except Exception as e:
+            print(f"[PDF] img2pdf rejected {p} ({e}); re-encoding that page…")
+        try:
+            buf = io.BytesIO()
+            with Image.open(p) as im:
+                im.convert("RGB").save(buf, format="PNG", compress_level=1)
+            inputs.append(buf.getvalue())
+        except Exception as e:
+            print(f"[PDF] Skipping unreadable page {p}: {e}")
+    return inputs
+
+def _pillow_pdf(files, out_pdf_path):
+    """Decode pages with Pillow and write them as one PDF in a single pass.
+
+    One decoded page is in memory at a time; each is stored as Flate-compressed RGB at
+    72 dpi (the page size Pillow's PDF writer gives). Pillow's append mode re-parses the
+    file and adds an xref per page, which is quadratic over a whole book.
+    """
+    offsets = {}
+    with open(out_pdf_path, "wb") as f:
+        def put(num, head, stream=None):
+            offsets[num] = f.tell()
+            if stream is None:
+                f.write(b"%d 0 obj\n<< %s >>\nendobj\n" % (num, head))
+            else:
+                f.write(b"%d 0 obj\n<< %s /Length %d >>\nstream\n" % (num, head, len(stream)))
+                f.write(stream)
+                f.write(b"\nendstream\nendobj\n")
+
+        f.write(b"%PDF-1.4\n%\xe2\xe3\xcf\xd3\n")
+        # objects: 1 catalog, 2 page tree, then image/contents/page per page
+        kids = []
+        for i, p in enumerate(files):
+            with Image.open(p) as im:
+                rgb = im.convert("RGB")
+            w, h = rgb.size
+            num = 3 + 3 * i
+            put(num, b"/Type /XObject /Subtype /Image /Width %d /Height %d /ColorSpace /DeviceRGB "
+                     b"/BitsPerComponent 8 /Filter /FlateDecode" % (w, h), zlib.compress(rgb.tobytes()))
+            put(num + 1, b"", b"q %d 0 0 %d 0 0 cm /Im0 Do Q" % (w, h))
+            put(num + 2, b"/Type /Page /Parent 2 0 R /MediaBox [0 0 %d %d] "
+                         b"/Resources << /XObject << /Im0 %d 0 R >> >> /Contents %d 0 R" % (w, h, num, num + 1))
+            kids.append(b"%d 0 R" % (num + 2))
+        put(2, b"/Type /Pages /Kids [%s] /Count %d" % (b" ".join(kids), len(kids)))
+        put(1, b"/Type /Catalog /Pages 2 0 R")
+
+        size = 3 + 3 * len(kids)
+        xref_pos = f.tell()
+        f.write(b"xref\n0 %d\n0000000000 65535 f \n" % size)
+        f.write(b"".join(b"%010d 00000 n \n" % offsets[n] for n in range(1, size)))
+        f.write(b"trailer\n<< /Size %d /Root 1 0 R >>\nstartxref\n%d\n%%%%EOF\n" % (size, xref_pos))
+
+def make_pdf_from_folder(folder, out_pdf_path, pattern="page_*.png", files=None):
+    # callers that already know the page order pass it in; otherwise derive it from the folder
+    if files is None:
+        files = img_list_sorted_ctime(folder, pattern)
     if not files:
         return None
+    # Try img2pdf (no recompression); only pages it rejects get re-encoded.
+    # Pillow (decodes every page) is the fallback when img2pdf can't be used at all.
+    img2pdf = None
     try:
         import img2pdf
-        with open(out_pdf_path, "wb") as f_out:
-            f_out.write(img2pdf.convert(files))
-        print(f"[PDF] Wrote {out_pdf_path} (img2pdf)")
-    except Exception as e:
-        print(f"[PDF] img2pdf failed ({e}); falling back to Pillow…")
-        from PIL import Image
-        imgs = [Image.open(p).convert("RGB") for p in files]
-        first, rest = imgs[0], imgs[1:]
-        first.save(out_pdf_path, save_all=True, append_images=rest)
-        print(f"[PDF] Wrote {out_pdf_path} (Pillow)")
+    except ImportError:
+        print("[PDF] img2pdf not installed. Falling back to Pillow…")
+    if img2pdf is not None:
+        try:
+            with open(out_pdf_path, "wb") as f_out:
+                try:
+                    img2pdf.convert(files, outputstream=f_out)
+                except Exception as e:
+                    print(f"[PDF] img2pdf failed on the batch ({e}); checking pages one by one…")
+                    f_out.seek(0)
+                    f_out.truncate()
+                    img2pdf.convert(_img2pdf_inputs(img2pdf, files), outputstream=f_out)
+            print(f"[PDF] Wrote {out_pdf_path} (img2pdf)")
+            return out_pdf_path
+        except Exception as e:
+            print(f"[PDF] img2pdf failed ({e}). Falling back to Pillow…")
+
+    _pillow_pdf(files, out_pdf_path)
+    print(f"[PDF] Wrote {out_pdf_path} (Pillow)")
     return out_pdf_path
 
-# Simple, permission-free activation (no AppleScript automation prompts)
-def activate_by_name(app_name: str):
+def _display_frame(region):
+    """Raw CoreGraphics pixels of region=(left, top, width, height), given in points.
+
+    Returns (data, bytes_per_row, width, height) at native pixel size, or None if the
+    display image can't be created or isn't 32-bit little-endian BGRX (e.g. 64 bpp or
+    10-bit-per-channel displays), the only layout decoded here.
+    """
+    left, top, width, height = region
+    cg = CGDisplayCreateImageForRect(CGMainDisplayID(), CGRectMake(left, top, width, height))
+    if cg is None or not _is_bgrx(cg):
+        return None
+    data = CGDataProviderCopyData(CGImageGetDataProvider(cg))
+    return data, CGImageGetBytesPerRow(cg), CGImageGetWidth(cg), CGImageGetHeight(cg)
+
+def _is_bgrx(cg) -> bool:
+    """True if cg holds 8-bit integer channels as 32-bit little-endian xRGB (BGRX in memory)."""
+    info = CGImageGetBitmapInfo(cg)
+    return (CGImageGetBitsPerPixel(cg) == 32 and CGImageGetBitsPerComponent(cg) == 8
+            and not info & kCGBitmapFloatComponents
+            and info & kCGBitmapByteOrderMask == kCGBitmapByteOrder32Little
+            and info & kCGBitmapAlphaInfoMask in (kCGImageAlphaNoneSkipFirst,
+                                                   kCGImageAlphaPremultipliedFirst,
+                                                   kCGImageAlphaFirst))
+
+def grab_region(region, into=None, digest=False):
+    """Screenshot region=(left, top, width, height), given in points, at native pixel size.
+
+    Returns (image, signature, digest). Reads the CoreGraphics display image in-process
+    (no screencapture subprocess) and signs it from the same raw buffer; falls back to
+    pyautogui if the display image can't be created or isn't BGRX. If `into` is an RGB
+    image of the right size, its pixel buffer is overwritten and it is returned.
+    digest is a hash of every pixel when requested, else None.
+    """
+    frame = _display_frame(region)
+    if frame is None:
+        img = pyautogui.screenshot(region=region)
+        return img, page_signature(img), _hash64(img.tobytes()) if digest else None
+    data, bpr, w, h = frame
+    sig = _raw_signature(data, bpr, w, h)
+    full = _frame_digest(data, bpr, w, h) if digest else None
+    # rows may be padded past w * 4
+    if into is not None and into.mode == "RGB" and into.size == (w, h):
+        into.frombytes(data, "raw", "BGRX", bpr, 1)
+        return into, sig, full
+    return Image.frombytes("RGB", (w, h), data, "raw", "BGRX", bpr, 1), sig, full
+
+def region_signature(region) -> int:
+    """The signature grab_region would return for region, without decoding the frame."""
+    frame = _display_frame(region)
+    if frame is None:
+        return page_signature(pyautogui.screenshot(region=region))
+    return _raw_signature(*frame)
+
+def _hash64(b) -> int:
+    if _XXHASH_OK:
+        return xxhash.xxh3_64_intdigest(b)
+    return int.from_bytes(hashlib.blake2b(b, digest_size=8).digest(), "big")
+
+def _raw_signature(data, bpr, w, h) -> int:
+    """64-bit signature of every SIG_STEP-th row of a BGRX frame, sampled every SIG_STEP pixels.
+
+    Skipped rows are never read; the odd byte step walks through all channels.
+    """
+    mv = memoryview(data)
+    step = SIG_STEP * 4 + 1
+    return _hash64(b"".join(mv[y * bpr:y * bpr + w * 4:step].tobytes() for y in range(0, h, SIG_STEP)))
+
+def _frame_digest(data, bpr, w, h) -> int:
+    """64-bit hash of every pixel of a BGRX frame (row padding excluded)."""
+    if bpr == w * 4:
+        return _hash64(data)
+    mv = memoryview(data)
+    return _hash64(b"".join(mv[y * bpr:y * bpr + w * 4] for y in range(h)))
+
+def nudge_pointer():
+    """Post one mouse-moved event at the current cursor position (keeps the event stream “hot”)."""
+    pos = CGEventGetLocation(CGEventCreate(None))
+    CGEventPost(kCGHIDEventTap, CGEventCreateMouseEvent(None, kCGEventMouseMoved, pos, kCGMouseButtonLeft))
+
+def page_signature(img) -> int:
+    """64-bit signature of a downsampled grayscale copy of img (for duplicate detection)."""
+    return _hash64(img.convert("L").resize(SIG_SIZE, Image.BILINEAR).tobytes())
+
+def save_png(img, path):
+    """Write one captured page. Runs on the writer pool, so failures are reported here."""
+    try:
+        if _PYSPNG_OK:
+            with open(path, "wb") as f:
+                f.write(pyspng.encode(np.asarray(img), compress_level=1))
+        else:
+            img.save(path, format="PNG", compress_level=1, optimize=False)
+        print(f"[Capture] {path}")
+        return True
+    except Exception as e:
+        print(f"[Capture] Save failed for {path}: {e}")
+        return False
+
+def copy_pdf(src, dst):
+    """Copy src to dst as an APFS clone (no data copied) when possible, else shutil.copyfile.
+
+    shutil.copyfile is already kernel-side (fcopyfile on macOS), and os.sendfile on macOS
+    only writes to sockets, so clonefile(2) is the remaining win. It fails across volumes
+    or if dst exists, in which case the regular copy runs.
+    """
+    clonefile = getattr(ctypes.CDLL(None, use_errno=True), "clonefile", None)
+    if clonefile is not None and clonefile(os.fsencode(src), os.fsencode(dst), 0) == 0:
+        return
+    shutil.copyfile(src, dst)
+
+def wait_for_page_settle(region, page_sig, timeout, interval=0.05):
+    """Sample region until it differs from page_sig and two samples in a row match.
+
+    Returns early once the next page has rendered; otherwise gives up after timeout
+    seconds (e.g. on the last page, where nothing changes).
+    """
+    deadline = time.monotonic() + timeout
+    last = None
+    while True:
+        time.sleep(interval)
+        sig = region_signature(region)
+        if sig == last and sig != page_sig:
+            return True
+        last = sig
+        if time.monotonic() >= deadline:
+            return False
+
+def find_running_app(app_name: str):
+    """NSRunningApplication whose localized name is app_name (None if not found / no AppKit)."""
+    if not (_APPKIT_OK and app_name):
+        return None
+    for app in NSWorkspace.sharedWorkspace().runningApplications():
+        if app.localizedName() == app_name:
+            return app
+    return None
+
+# Simple, permission-free activation (no AppleScript automation prompts).
+# Pass the app from find_running_app() to activate in-process instead of spawning `open`.
+def activate_by_name(app_name: str, app=None):
     if not app_name:
         return False
+    if app is not None and not app.isTerminated():
+        try:
+            if app.activateWithOptions_(NSApplicationActivateIgnoringOtherApps):
+                return True
+        except Exception as e:
+            print(f"[Activate] activateWithOptions failed: {e}")
     try:
         subprocess.Popen(["open", "-a", app_name])
         return True
@@ -96,6 +383,10 @@ class MainWindow(QMainWindow):
         self.top_right = None
         self.bottom_left = None
         self.preview_img = None   # PIL image captured at F8
+        self._preview_qimg = None      # QImage of preview_img, rebuilt only when it changes
+        self._preview_qimg_src = None
+        self._preview_canvas = None    # QPixmap at the preview label's size
+        self._screen_size = pyautogui.size()  # points; fixed for the session
         self.front_app_name = None
         self.session_dt = None
         self.save_dir = None
@@ -121,7 +412,7 @@ class MainWindow(QMainWindow):
         self.chk_use_keyboard = QCheckBox("Use Right Arrow instead of mouse click")
 
         self.delay_edit = QLineEdit("1.2"); self.delay_edit.setFixedWidth(80)
-        self.delay_label = QLabel("Delay after advance (seconds):")
+        self.delay_label = QLabel("Max wait after advance (seconds):")
 
         self.chk_fixed = QCheckBox("Capture a specific number of pages")
         self.spin_pages = QSpinBox(); self.spin_pages.setRange(1, 100000); self.spin_pages.setValue(386); self.spin_pages.setEnabled(False)
@@ -167,10 +458,14 @@ class MainWindow(QMainWindow):
             "If F-keys control brightness/volume, hold Fn or enable “Use F1, F2, etc. as standard function keys”."
         )
 
-        # poll F-keys on the main thread (no Carbon handlers = no HIToolbox crashes)
-        self.poll_timer = QTimer(self)
-        self.poll_timer.timeout.connect(self._poll_hotkeys)
-        self.poll_timer.start(30)
+        # F-keys arrive via a listen-only event tap on the main run loop (no Carbon
+        # handlers = no HIToolbox crashes); poll key state if the tap can't be created
+        self._key_tap = None
+        if not self._install_key_tap():
+            print("[Hotkeys] Event tap unavailable; polling F-keys instead.")
+            self.poll_timer = QTimer(self)
+            self.poll_timer.timeout.connect(self._poll_hotkeys)
+            self.poll_timer.start(30)
 
     # ------------ arming ------------
     def arm(self, which: str):
@@ -191,38 +486,77 @@ class MainWindow(QMainWindow):
         pw, ph = int(sw * s), int(sh * s)
         xoff, yoff = (lw - pw) // 2, (lh - ph) // 2
 
-        canvas = QPixmap(lw, lh)
+        # reuse one canvas per widget size; the label drops its shared copy first
+        # so fill() paints in place instead of detaching into a new buffer
+        canvas = self._preview_canvas
+        if canvas is None or canvas.width() != lw or canvas.height() != lh:
+            canvas = self._preview_canvas = QPixmap(lw, lh)
+        else:
+            self.preview.clear()
         canvas.fill(Qt.white)
         painter = QPainter(canvas)
 
-        qimg = ImageQt.ImageQt(src)
-        painter.drawImage(QRect(xoff, yoff, pw, ph), qimg, QRect(0, 0, sw, sh))
+        if self._preview_qimg_src is not src:
+            self._preview_qimg = ImageQt.ImageQt(src)
+            self._preview_qimg_src = src
+
+        # image pixels → widget: fit scale + letterbox offset, applied by Qt when drawing
+        to_widget = QTransform()
+        to_widget.translate(xoff, yoff)
+        to_widget.scale(s, s)
+        painter.setTransform(to_widget)
+        painter.drawImage(0, 0, self._preview_qimg)
 
         # correct for Retina scaling (coords are in points; screenshot is pixels)
-        screen_w, screen_h = pyautogui.size()
+        screen_w, screen_h = self._screen_size
         ratio_x = sw / float(screen_w) if screen_w else 1.0
         ratio_y = sh / float(screen_h) if screen_h else 1.0
 
-        # draw selection rect if both corners set
+        # draw selection rect if both corners set (in screen points)
         if self.top_right and self.bottom_left:
             (x_tr, y_tr) = self.top_right
             (x_bl, y_bl) = self.bottom_left
             left, top = min(x_tr, x_bl), min(y_tr, y_bl)
             right, bottom = max(x_tr, x_bl), max(y_tr, y_bl)
 
-            rx1 = int(left * ratio_x * s) + xoff
-            ry1 = int(top * ratio_y * s) + yoff
-            rx2 = int(right * ratio_x * s) + xoff
-            ry2 = int(bottom * ratio_y * s) + yoff
-
-            pen = QPen(Qt.red); pen.setWidth(3)
+            painter.setTransform(QTransform.fromScale(ratio_x, ratio_y) * to_widget)
+            pen = QPen(Qt.red); pen.setWidth(3); pen.setCosmetic(True)  # 3 px regardless of scale
             painter.setPen(pen)
-            painter.drawRect(rx1, ry1, rx2 - rx1, ry2 - ry1)
+            painter.drawRect(QRectF(left, top, right - left, bottom - top))
 
         painter.end()
         self.preview.setPixmap(canvas)
 
-    # ------------ hotkey polling ------------
+    # ------------ hotkeys ------------
+    def _install_key_tap(self) -> bool:
+        def on_event(proxy, etype, event, refcon):
+            if etype in (kCGEventTapDisabledByTimeout, kCGEventTapDisabledByUserInput):
+                CGEventTapEnable(self._key_tap, True)
+            elif etype == kCGEventKeyDown:
+                vk = CGEventGetIntegerValueField(event, kCGKeyboardEventKeycode)
+                repeat = CGEventGetIntegerValueField(event, kCGKeyboardEventAutorepeat)
+                if vk in (VK_F6, VK_F7, VK_F8) and not repeat:
+                    # handle outside the tap callback (F8 takes a screenshot)
+                    QTimer.singleShot(0, lambda: self._handle_key_down(vk))
+            return event
+
+        try:
+            tap = CGEventTapCreate(
+                kCGSessionEventTap, kCGHeadInsertEventTap, kCGEventTapOptionListenOnly,
+                CGEventMaskBit(kCGEventKeyDown), on_event, None,
+            )
+            if tap is None:
+                return False
+            self._key_tap = tap
+            self._key_tap_callback = on_event  # keep the Python callback alive
+            self._key_tap_source = CFMachPortCreateRunLoopSource(None, tap, 0)
+            CFRunLoopAddSource(CFRunLoopGetCurrent(), self._key_tap_source, kCFRunLoopCommonModes)
+            CGEventTapEnable(tap, True)
+            return True
+        except Exception as e:
+            print(f"[Hotkeys] CGEventTapCreate failed: {e}")
+            return False
+
     def _is_key_down(self, keycode: int) -> bool:
         try:
             return bool(CGEventSourceKeyState(kCGEventSourceStateCombinedSessionState, keycode))
@@ -250,14 +584,9 @@ class MainWindow(QMainWindow):
                 pos = pyautogui.position()
                 self.next_xy = (int(pos.x), int(pos.y))
                 self.preview_img = pyautogui.screenshot()  # full screen
-                # record current front app name
+                # record current front app name (in-process; no osascript / Automation prompt)
                 try:
-                    r = subprocess.run(
-                        ['osascript', '-e',
-                         'tell application "System Events" to get name of (first process whose frontmost is true)'],
-                        capture_output=True, text=True, timeout=2
-                    )
-                    self.front_app_name = r.stdout.strip() or None
+                    self.front_app_name = NSWorkspace.sharedWorkspace().frontmostApplication().localizedName() or None
                 except Exception:
                     self.front_app_name = None
 
@@ -335,25 +664,24 @@ class MainWindow(QMainWindow):
                 caffeinate = None
                 print(f"[caffeinate] spawn failed: {e}")
 
-            # C) Touch Bar / UI idle preventer: pulse “user active” every ~30s
-            userpulse_stop = threading.Event()
-            def _userpulse():
-                while not userpulse_stop.is_set():
-                    try:
-                        subprocess.run(
-                            ["caffeinate", "-u", "-t", "2"],
-                            stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL
-                        )
-                    except Exception:
-                        pass
-                    userpulse_stop.wait(30)
-
-            pulse_thread = threading.Thread(target=_userpulse, daemon=True)
-            pulse_thread.start()
+            # C) Touch Bar / UI idle preventer: one display-sleep assertion for the whole run
+            display_assertion = None
+            if _IOKIT_OK:
+                try:
+                    err, display_assertion = _IOKIT["IOPMAssertionCreateWithName"](
+                        "PreventUserIdleDisplaySleep", 255, "BookCap capture", None  # 255 = kIOPMAssertionLevelOn
+                    )
+                    if err != 0:
+                        print(f"[IOPM] assertion create failed: {err:#x}")
+                        display_assertion = None
+                except Exception as e:
+                    print(f"[IOPM] assertion create failed: {e}")
+
             # ===== END: Stay-awake stack =====
 
-            # Switch back to target app off the UI thread
-            if not activate_by_name(self.front_app_name):
+            # Switch back to target app off the UI thread (looked up once, reused for refocus)
+            target_app = find_running_app(self.front_app_name)
+            if not activate_by_name(self.front_app_name, target_app):
                 print("[Activate] Falling back to direct click without activation.")
             time.sleep(0.5)
 
@@ -364,39 +692,44 @@ class MainWindow(QMainWindow):
             except Exception as e:
                 print(f"[Focus] click failed: {e}")
 
-            prev_bytes = None
+            prev_sig = prev_digest = None
             page_index = 0
+            # PNG encoding overlaps with advancing/waiting for the next page
+            writer = ThreadPoolExecutor(max_workers=2)
+            saves = []  # (future, path) in capture order
+            # page frames are recycled once written: one being captured plus one per
+            # writer; get() blocks if the writers fall behind (None = not allocated yet)
+            free_frames = queue.Queue()
+            for _ in range(3):
+                free_frames.put(None)
 
             try:
                 while True:
                     page_index += 1
 
-                    # tiny jiggle keeps the event stream “hot”
-                    pyautogui.moveRel(0, 1, duration=0)
-                    pyautogui.moveRel(0, -1, duration=0)
+                    nudge_pointer()
+
+                    img, sig, digest = grab_region(region, into=free_frames.get(), digest=auto_stop)
+
+                    # check before saving, so a duplicate never reaches disk; the sampled
+                    # signature can miss small changes (e.g. a page number), so confirm on
+                    # every pixel (frames are recycled, hence the previous page's digest)
+                    if auto_stop and prev_sig is not None and sig == prev_sig and digest == prev_digest:
+                        print(f"[Auto-Stop] Duplicate detected at page {page_index}; not saved.")
+                        break
+                    prev_sig, prev_digest = sig, digest
 
-                    img = pyautogui.screenshot(region=region)
                     path = os.path.join(self.save_dir, f"page_{page_index:04d}.png")
-                    img.save(path)
-                    print(f"[Capture] {path}")
-
-                    if auto_stop:
-                        img_bytes = img.convert("RGB").tobytes()
-                        if prev_bytes is not None and img_bytes == prev_bytes:
-                            try:
-                                os.remove(path)
-                                print(f"[Auto-Stop] Duplicate detected. Removed: {path}")
-                            except Exception:
-                                pass
-                            break
-                        prev_bytes = img_bytes
+                    fut = writer.submit(save_png, img, path)
+                    fut.add_done_callback(lambda _f, img=img: free_frames.put(img))
+                    saves.append((fut, path))
 
                     if fixed and page_index >= pages:
                         break
 
                     # Re-assert focus every 10 pages
                     if page_index % 10 == 0:
-                        activate_by_name(self.front_app_name)
+                        activate_by_name(self.front_app_name, target_app)
                         time.sleep(0.1)
 
                     if use_keyboard:
@@ -410,13 +743,18 @@ class MainWindow(QMainWindow):
                             time.sleep(0.05)
                             pyautogui.click(x, y)
 
-                    time.sleep(delay)
+                    # delay is an upper bound; usually the new page settles much sooner
+                    wait_for_page_settle(region, prev_sig, delay)
             finally:
-                # stop user-activity pulses
-                try:
-                    userpulse_stop.set()
-                except Exception:
-                    pass
+                # let queued pages finish writing before the PDF step
+                writer.shutdown(wait=True)
+
+                # release the display-sleep assertion
+                if display_assertion is not None:
+                    try:
+                        _IOKIT["IOPMAssertionRelease"](display_assertion)
+                    except Exception as e:
+                        print(f"[IOPM] assertion release failed: {e}")
 
                 # end NSActivity so macOS can nap again
                 if _FOUNDATION_OK:
@@ -436,13 +774,14 @@ class MainWindow(QMainWindow):
 
             # Make PDFs
             run_pdf_path = os.path.join(self.save_dir, "book.pdf")
-            made = make_pdf_from_folder(self.save_dir, out_pdf_path=run_pdf_path)
+            pages_written = [path for fut, path in saves if fut.result()]
+            made = make_pdf_from_folder(self.save_dir, out_pdf_path=run_pdf_path, files=pages_written)
             if made:
                 pdf_root = os.path.join(os.getcwd(), "PDF")
                 human_name = f"{self.session_dt:%Y}-{self.session_dt:%b}-{self.session_dt.day}-{self.session_dt:%H%M}.pdf"
                 dest_pdf = os.path.join(pdf_root, human_name)
                 try:
-                    shutil.copyfile(made, dest_pdf)
+                    copy_pdf(made, dest_pdf)
                     print(f"[PDF] Copied to {dest_pdf}")
                 except Exception as e:
                     print(f"[PDF] Copy failed: {e}")
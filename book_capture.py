@@ -1,7 +1,9 @@
 #!/usr/bin/env python3
+import io
 import os
 import time
 import glob
+import zlib
 import shutil
 import threading
 from datetime import datetime
@@ -73,8 +75,69 @@ def _img_file_order_ctime_asc(files):
         return (birth if birth else mtime, mtime, os.path.basename(p).lower())
     return sorted(files, key=times)
 
+def _img2pdf_inputs(img2pdf, files):
+    """Inputs for a retry after img2pdf rejected the batch: pages it accepts pass through
+    untouched, pages it rejects (e.g. alpha channel) are re-encoded alone as RGB PNG."""
+    inputs = []
+    for p in files:
+        try:
+            img2pdf.convert(p)
+            inputs.append(p)
+            continue
+        except Exception as e:
+            print(f"[PDF] img2pdf rejected {p} ({e}); re-encoding that page…")
+        try:
+            buf = io.BytesIO()
+            with Image.open(p) as im:
+                im.convert("RGB").save(buf, format="PNG", compress_level=1)
+            inputs.append(buf.getvalue())
+        except Exception as e:
+            print(f"[PDF] Skipping unreadable page {p}: {e}")
+    return inputs
+
+def _pillow_pdf(files, out_pdf_path):
+    """Decode pages with Pillow and write them as one PDF in a single pass.
+
+    One decoded page is in memory at a time; each is stored as Flate-compressed RGB at
+    72 dpi (the page size Pillow's PDF writer gives). Pillow's append mode re-parses the
+    file and adds an xref per page, which is quadratic over a whole book.
+    """
+    offsets = {}
+    with open(out_pdf_path, "wb") as f:
+        def put(num, head, stream=None):
+            offsets[num] = f.tell()
+            if stream is None:
+                f.write(b"%d 0 obj\n<< %s >>\nendobj\n" % (num, head))
+            else:
+                f.write(b"%d 0 obj\n<< %s /Length %d >>\nstream\n" % (num, head, len(stream)))
+                f.write(stream)
+                f.write(b"\nendstream\nendobj\n")
+
+        f.write(b"%PDF-1.4\n%\xe2\xe3\xcf\xd3\n")
+        # objects: 1 catalog, 2 page tree, then image/contents/page per page
+        kids = []
+        for i, p in enumerate(files):
+            with Image.open(p) as im:
+                rgb = im.convert("RGB")
+            w, h = rgb.size
+            num = 3 + 3 * i
+            put(num, b"/Type /XObject /Subtype /Image /Width %d /Height %d /ColorSpace /DeviceRGB "
+                     b"/BitsPerComponent 8 /Filter /FlateDecode" % (w, h), zlib.compress(rgb.tobytes()))
+            put(num + 1, b"", b"q %d 0 0 %d 0 0 cm /Im0 Do Q" % (w, h))
+            put(num + 2, b"/Type /Page /Parent 2 0 R /MediaBox [0 0 %d %d] "
+                         b"/Resources << /XObject << /Im0 %d 0 R >> >> /Contents %d 0 R" % (w, h, num, num + 1))
+            kids.append(b"%d 0 R" % (num + 2))
+        put(2, b"/Type /Pages /Kids [%s] /Count %d" % (b" ".join(kids), len(kids)))
+        put(1, b"/Type /Catalog /Pages 2 0 R")
+
+        size = 3 + 3 * len(kids)
+        xref_pos = f.tell()
+        f.write(b"xref\n0 %d\n0000000000 65535 f \n" % size)
+        f.write(b"".join(b"%010d 00000 n \n" % offsets[n] for n in range(1, size)))
+        f.write(b"trailer\n<< /Size %d /Root 1 0 R >>\nstartxref\n%d\n%%%%EOF\n" % (size, xref_pos))
+
 def make_pdf_from_folder(folder, out_pdf_path, pattern="page_*.png"):
-    files = [f for f in glob.glob(os.path.join(folder, pattern))
+    files = [f for f in glob.iglob(os.path.join(folder, pattern))
              if os.path.splitext(f)[1].lower() in {".png", ".jpg", ".jpeg", ".tif", ".tiff"}]
     if not files:
         print("[PDF] No images found to combine.")
@@ -82,18 +145,30 @@ def make_pdf_from_folder(folder, out_pdf_path, pattern="page_*.png"):
 
     files = _img_file_order_ctime_asc(files)  # oldest → newest
 
-    # Try img2pdf (no recompression); fallback to Pillow
+    # Try img2pdf (no recompression); only pages it rejects get re-encoded.
+    # Pillow (decodes every page) is the fallback when img2pdf can't be used at all.
+    img2pdf = None
     try:
         import img2pdf
-        with open(out_pdf_path, "wb") as f_out:
-            f_out.write(img2pdf.convert(files))
-        print(f"[PDF] Wrote {out_pdf_path} (via img2pdf)")
-    except Exception as e:
-        print(f"[PDF] img2pdf unavailable/failed ({e}). Falling back to Pillow…")
-        imgs = [Image.open(p).convert("RGB") for p in files]
-        first, rest = imgs[0], imgs[1:]
-        first.save(out_pdf_path, save_all=True, append_images=rest)
-        print(f"[PDF] Wrote {out_pdf_path} (via Pillow)")
+    except ImportError:
+        print("[PDF] img2pdf not installed. Falling back to Pillow…")
+    if img2pdf is not None:
+        try:
+            with open(out_pdf_path, "wb") as f_out:
+                try:
+                    img2pdf.convert(files, outputstream=f_out)
+                except Exception as e:
+                    print(f"[PDF] img2pdf failed on the batch ({e}); checking pages one by one…")
+                    f_out.seek(0)
+                    f_out.truncate()
+                    img2pdf.convert(_img2pdf_inputs(img2pdf, files), outputstream=f_out)
+            print(f"[PDF] Wrote {out_pdf_path} (via img2pdf)")
+            return out_pdf_path
+        except Exception as e:
+            print(f"[PDF] img2pdf failed ({e}). Falling back to Pillow…")
+
+    _pillow_pdf(files, out_pdf_path)
+    print(f"[PDF] Wrote {out_pdf_path} (via Pillow)")
 
     return out_pdf_path
 
@@ -137,7 +212,7 @@ def main():
         # 1) Screenshot region
         img = pyautogui.screenshot(region=region)
         path = os.path.join(save_dir, f"page_{page_index:04d}.png")
-        img.save(path)
+        img.save(path, format="PNG", compress_level=1, optimize=False)
         print(f"[Capture] Saved {path}")
 
         # 2) Auto end-detection (if enabled)
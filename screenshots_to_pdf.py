@@ -1,23 +1,403 @@
 #!/usr/bin/env python3
 import argparse
 import os
+import re
 import sys
+import time
+import zlib
+import struct
 import glob
+import fnmatch
+import hashlib
 import img2pdf
-from datetime import datetime
+from collections import deque, namedtuple
+from concurrent.futures import ThreadPoolExecutor
+from functools import partial
+from itertools import islice
 
-ALLOWED_EXTS = {".png", ".jpg", ".jpeg", ".tif", ".tiff"}
+# a tuple, so suffix checks are a single str.endswith call
+ALLOWED_EXTS = (".png", ".jpg", ".jpeg", ".tif", ".tiff")
+DEFAULT_DPI = 96.0  # img2pdf's default when an image carries no resolution
+STAT_WORKERS = min(32, (os.cpu_count() or 1) * 4)
+PNG_SIGNATURE = b"\x89PNG\r\n\x1a\n"
 
-def get_times(path):
-    st = os.stat(path)
-    # Prefer true creation time on macOS; fallback to mtime elsewhere.
-    birth = getattr(st, "st_birthtime", None)
-    mtime = st.st_mtime
-    # Return (primary_time, secondary_time) for stable sorting
-    return (birth if birth else mtime, mtime)
+# Prefer true creation time on macOS; fallback to mtime elsewhere.
+# get_times(st) returns (primary_time, secondary_time) for stable sorting;
+# the platform check happens once here rather than per file.
+if hasattr(os.stat_result, "st_birthtime"):
+    def get_times(st):
+        return (st.st_birthtime or st.st_mtime, st.st_mtime)
+else:
+    def get_times(st):
+        return (st.st_mtime, st.st_mtime)
 
 def is_image(path):
-    return os.path.splitext(path)[1].lower() in ALLOWED_EXTS
+    return path.lower().endswith(ALLOWED_EXTS)
+
+# ---------- read-ahead ----------
+def _read_file(path):
+    with open(path, "rb") as f:
+        return f.read()
+
+def read_ahead(paths, workers):
+    """Yield each file's contents in order while up to 2 * workers later files are read
+    on a thread pool, so disk reads overlap with PDF assembly."""
+    paths = iter(paths)
+    with ThreadPoolExecutor(max_workers=workers) as ex:
+        pending = deque(ex.submit(_read_file, p) for p in islice(paths, 2 * workers))
+        while pending:
+            data = pending.popleft().result()
+            nxt = next(paths, None)
+            if nxt is not None:
+                pending.append(ex.submit(_read_file, nxt))
+            yield data
+
+class NextChunk:
+    """File-like stand-in for img2pdf: read() returns the next item from a shared
+    read_ahead() generator. img2pdf calls read() once per image, in list order."""
+    def __init__(self, chunks):
+        self._chunks = chunks
+
+    def read(self):
+        return next(self._chunks)
+
+# ---------- direct PDF assembly (no img2pdf, no decoding) ----------
+class UnsupportedImage(Exception):
+    """Image the direct writer can't embed without decoding; use img2pdf instead."""
+
+# One embeddable image: its size, resolution, color space, extra XObject dict entries,
+# the compressed stream to copy verbatim, and an optional zlib-compressed ICC profile.
+Embed = namedtuple("Embed", "width height dpi colorspace colors entries stream icc")
+
+def png_embed(data):
+    """Embed for a non-interlaced gray/RGB PNG without Exif: its IDAT data with PNG predictors."""
+    if data[:8] != PNG_SIGNATURE:
+        raise UnsupportedImage("not a PNG")
+    mv = memoryview(data)
+    pos, ihdr, idat, dpi, icc = 8, None, [], None, None
+    while pos + 8 <= len(data):
+        length = int.from_bytes(mv[pos:pos + 4], "big")
+        ctype = bytes(mv[pos + 4:pos + 8])
+        body = mv[pos + 8:pos + 8 + length]
+        pos += 12 + length
+        if ctype == b"IHDR":
+            ihdr = body
+        elif ctype == b"IDAT":
+            idat.append(body)
+        elif ctype == b"pHYs":
+            ppx, ppy, unit = struct.unpack(">IIB", body)
+            if unit == 1 and ppx and ppy:  # pixels per metre
+                dpi = (round(ppx * 0.0254), round(ppy * 0.0254))  # as img2pdf does
+        elif ctype == b"eXIf":
+            # Exif orientation rotates img2pdf's page; leave those files to it
+            raise UnsupportedImage("PNG with Exif data")
+        elif ctype == b"iCCP":
+            raw = bytes(body)
+            icc = raw[raw.index(b"\0") + 2:]  # skip name + compression method (zlib)
+        elif ctype == b"IEND":
+            break
+    if ihdr is None or not idat:
+        raise UnsupportedImage("truncated PNG")
+    width, height, depth, color, _, _, interlace = struct.unpack(">IIBBBBB", ihdr)
+    if interlace:
+        raise UnsupportedImage("interlaced PNG")
+    if depth == 16:  # 16-bit components need PDF 1.5; the writer emits 1.4
+        raise UnsupportedImage("16-bit PNG")
+    if color == 0:
+        colorspace, colors = b"/DeviceGray", 1
+    elif color == 2:
+        colorspace, colors = b"/DeviceRGB", 3
+    else:
+        raise UnsupportedImage(f"PNG color type {color} (palette/alpha)")
+    entries = (b"/BitsPerComponent %d /Filter /FlateDecode "
+               b"/DecodeParms << /Predictor 15 /Colors %d /BitsPerComponent %d /Columns %d >>"
+               % (depth, colors, depth, width))
+    return Embed(width, height, dpi or (DEFAULT_DPI, DEFAULT_DPI), colorspace, colors,
+                 entries, b"".join(idat), icc)
+
+def jpeg_embed(data):
+    """Embed for a gray/RGB JPEG without Exif: the whole file as a /DCTDecode stream."""
+    if data[:2] != b"\xff\xd8":
+        raise UnsupportedImage("not a JPEG")
+    pos, dpi, icc = 2, None, {}
+    while pos + 4 <= len(data):
+        if data[pos] != 0xFF:
+            raise UnsupportedImage("corrupt JPEG")
+        marker = data[pos + 1]
+        if marker == 0xFF:  # fill byte
+            pos += 1
+            continue
+        if marker == 0x01 or 0xD0 <= marker <= 0xD7:  # no-length markers
+            pos += 2
+            continue
+        length = int.from_bytes(data[pos + 2:pos + 4], "big")
+        seg = data[pos + 4:pos + 2 + length]
+        if marker == 0xE1 and seg[:6] == b"Exif\0\0":
+            # Exif orientation/resolution change img2pdf's page; leave those files to it
+            raise UnsupportedImage("JPEG with Exif data")
+        if marker == 0xE2 and seg[:12] == b"ICC_PROFILE\0" and len(seg) >= 14:
+            icc[seg[12]] = seg[14:]  # profile split over APP2 segments, numbered from 1
+        elif marker == 0xE0 and seg[:5] == b"JFIF\0" and len(seg) >= 12:
+            units, xd, yd = seg[7], int.from_bytes(seg[8:10], "big"), int.from_bytes(seg[10:12], "big")
+            if xd and yd and units in (1, 2):  # dots per inch / per cm
+                dpi = (xd, yd) if units == 1 else (xd * 2.54, yd * 2.54)
+        elif 0xC0 <= marker <= 0xCF and marker not in (0xC4, 0xC8, 0xCC):  # SOFn
+            height, width, colors = int.from_bytes(seg[1:3], "big"), int.from_bytes(seg[3:5], "big"), seg[5]
+            if colors not in (1, 3):
+                raise UnsupportedImage(f"JPEG with {colors} components")
+            colorspace = b"/DeviceGray" if colors == 1 else b"/DeviceRGB"
+            profile = zlib.compress(b"".join(icc[k] for k in sorted(icc))) if icc else None
+            return Embed(width, height, dpi or (DEFAULT_DPI, DEFAULT_DPI), colorspace, colors,
+                         b"/BitsPerComponent 8 /Filter /DCTDecode", data, profile)
+        pos += 2 + length
+    raise UnsupportedImage("no JPEG frame header")
+
+TIFF_TYPES = {3: ("H", 2), 4: ("I", 4), 5: ("II", 8)}  # SHORT, LONG, RATIONAL
+
+def _tiff_tags(data):
+    """({tag: values}, more_pages) for the first IFD of a TIFF (SHORT/LONG/RATIONAL tags only)."""
+    bo = {b"II": "<", b"MM": ">"}.get(bytes(data[:2]))
+    if bo is None or struct.unpack_from(bo + "H", data, 2)[0] != 42:
+        raise UnsupportedImage("not a TIFF")
+    (ifd,) = struct.unpack_from(bo + "I", data, 4)
+    (n,) = struct.unpack_from(bo + "H", data, ifd)
+    tags = {}
+    for i in range(n):
+        tag, typ, count, raw = struct.unpack_from(bo + "HHI4s", data, ifd + 2 + 12 * i)
+        if typ not in TIFF_TYPES:
+            continue
+        fmt, size = TIFF_TYPES[typ]
+        # values that fit in 4 bytes are stored inline, others at an offset
+        buf, off = (raw, 0) if size * count <= 4 else (data, struct.unpack(bo + "I", raw)[0])
+        vals = struct.unpack_from(bo + fmt * count, buf, off)
+        if typ == 5:
+            vals = tuple(vals[k] / vals[k + 1] if vals[k + 1] else 0 for k in range(0, len(vals), 2))
+        tags[tag] = vals
+    (next_ifd,) = struct.unpack_from(bo + "I", data, ifd + 2 + 12 * n)
+    return tags, next_ifd != 0
+
+def tiff_embed(data):
+    """Embed for a single-page, single-strip CCITT Group 4 TIFF: the strip as /CCITTFaxDecode."""
+    tags, more_pages = _tiff_tags(data)
+    if tags.get(259, (1,))[0] != 4:  # Compression
+        raise UnsupportedImage("TIFF is not CCITT Group 4")
+    if more_pages:
+        raise UnsupportedImage("multi-page TIFF")
+    offsets, counts = tags.get(273, ()), tags.get(279, ())  # StripOffsets, StripByteCounts
+    if len(offsets) != 1 or len(counts) != 1:
+        raise UnsupportedImage("multi-strip TIFF")
+    if tags.get(274, (1,))[0] != 1:  # Orientation: img2pdf rotates the page
+        raise UnsupportedImage("rotated TIFF")
+    if tags.get(266, (1,))[0] != 1:  # FillOrder
+        raise UnsupportedImage("TIFF with lsb-first FillOrder")
+    photometric = tags.get(262, (0,))[0]
+    if photometric not in (0, 1):  # WhiteIsZero / BlackIsZero
+        raise UnsupportedImage(f"TIFF photometric interpretation {photometric}")
+    width, height = tags[256][0], tags[257][0]
+    dpi = None
+    xres, yres, unit = tags.get(282, (0,))[0], tags.get(283, (0,))[0], tags.get(296, (2,))[0]
+    if xres and yres and unit in (2, 3):  # per inch / per cm
+        dpi = (round(xres), round(yres)) if unit == 2 else (round(xres * 2.54), round(yres * 2.54))
+    entries = (b"/BitsPerComponent 1 /Filter /CCITTFaxDecode "
+               b"/DecodeParms << /K -1 /Columns %d /Rows %d /BlackIs1 %s >>"
+               % (width, height, b"true" if photometric == 1 else b"false"))
+    return Embed(width, height, dpi or (DEFAULT_DPI, DEFAULT_DPI), b"/DeviceGray", 1,
+                 entries, data[offsets[0]:offsets[0] + counts[0]], None)
+
+def embed_image(data):
+    if data[:8] == PNG_SIGNATURE:
+        return png_embed(data)
+    if data[:2] in (b"II", b"MM"):
+        return tiff_embed(data)
+    return jpeg_embed(data)
+
+def can_embed(path):
+    """Cheap check, from the file header only, that the direct writer can take path.
+
+    Catches the usual misses (palette/alpha/16-bit/interlaced PNG, non-G4 or rotated TIFF)
+    before anything is written; rarer ones (Exif, CMYK JPEG, ...) still raise
+    UnsupportedImage while writing.
+    """
+    with open(path, "rb") as f:
+        head = f.read(32)
+        if head[:8] == PNG_SIGNATURE:
+            # IHDR is always the first chunk: bit depth, color type, ..., interlace
+            return (head[12:16] == b"IHDR" and head[24] != 16 and head[25] in (0, 2)
+                    and head[28] == 0)
+        if head[:2] == b"\xff\xd8":
+            return True
+        bo = {b"II": "<", b"MM": ">"}.get(head[:2])
+        if bo is None or len(head) < 8:
+            return False
+        f.seek(struct.unpack_from(bo + "I", head, 4)[0])
+        count = f.read(2)
+        if len(count) < 2:
+            return False
+        n = struct.unpack(bo + "H", count)[0]
+        ifd = f.read(12 * n)
+    if len(ifd) < 12 * n:
+        return False
+    tags = {}
+    for i in range(n):
+        tag, typ = struct.unpack_from(bo + "HH", ifd, 12 * i)
+        if tag in (259, 274) and typ in (3, 4):  # Compression, Orientation (SHORT/LONG)
+            tags[tag] = struct.unpack_from(bo + TIFF_TYPES[typ][0], ifd, 12 * i + 8)[0]
+    return tags.get(259) == 4 and tags.get(274, 1) == 1
+
+def _pdf_num(x):
+    return (b"%.4f" % x).rstrip(b"0").rstrip(b".")
+
+def write_pdf_direct(images, f_out):
+    """Write one page per PNG/JPEG/G4 TIFF (an iterable of file contents), copying each compressed
+    stream into the PDF as-is.
+
+    Pages are written as they arrive, so only the current image (plus any read-ahead)
+    is held in memory. Raises UnsupportedImage if an image needs decoding (the output
+    is then incomplete).
+    """
+    offsets = {}
+    pos = 0
+
+    def emit(b):
+        nonlocal pos
+        f_out.write(b)
+        pos += len(b)
+
+    def emit_stream(num, entries, stream):
+        offsets[num] = pos
+        emit(b"%d 0 obj\n<< %s /Length %d >>\nstream\n" % (num, entries, len(stream)))
+        emit(stream)
+        emit(b"\nendstream\nendobj\n")
+
+    def emit_dict(num, body):
+        offsets[num] = pos
+        emit(b"%d 0 obj\n<< %s >>\nendobj\n" % (num, body))
+
+    emit(b"%PDF-1.4\n%\xe2\xe3\xcf\xd3\n")
+    next_num = 3  # 1 = catalog, 2 = page tree (written last)
+    kids = []
+    seen = {}  # content digest -> (image obj, content obj, page width, page height)
+    for data in images:
+        # identical files (e.g. a re-captured page) share one image XObject + content stream
+        key = (len(data), hashlib.blake2b(data, digest_size=16).digest())
+        if key in seen:
+            im_num, content_num, pw, ph = seen[key]
+        else:
+            img = embed_image(data)
+
+            colorspace = img.colorspace
+            if img.icc is not None:
+                emit_stream(next_num, b"/N %d /Alternate %s /Filter /FlateDecode" % (img.colors, colorspace), img.icc)
+                colorspace = b"[/ICCBased %d 0 R]" % next_num
+                next_num += 1
+
+            im_num, content_num = next_num, next_num + 1
+            next_num += 2
+            emit_stream(im_num, b"/Type /XObject /Subtype /Image /Width %d /Height %d /ColorSpace %s %s"
+                        % (img.width, img.height, colorspace, img.entries), img.stream)
+            pw, ph = _pdf_num(img.width * 72.0 / img.dpi[0]), _pdf_num(img.height * 72.0 / img.dpi[1])
+            emit_stream(content_num, b"", b"q %s 0 0 %s 0 0 cm /Im0 Do Q" % (pw, ph))
+            seen[key] = (im_num, content_num, pw, ph)
+
+        page_num = next_num
+        next_num += 1
+        emit_dict(page_num, b"/Type /Page /Parent 2 0 R /MediaBox [0 0 %s %s] "
+                            b"/Resources << /XObject << /Im0 %d 0 R >> >> /Contents %d 0 R"
+                  % (pw, ph, im_num, content_num))
+        kids.append(page_num)
+
+    emit_dict(2, b"/Type /Pages /Kids [%s] /Count %d"
+              % (b" ".join(b"%d 0 R" % k for k in kids), len(kids)))
+    emit_dict(1, b"/Type /Catalog /Pages 2 0 R")
+
+    xref_pos = pos
+    emit(b"xref\n0 %d\n0000000000 65535 f \n" % next_num)
+    emit(b"".join(b"%010d 00000 n \n" % offsets[n] for n in range(1, next_num)))
+    emit(b"trailer\n<< /Size %d /Root 1 0 R >>\nstartxref\n%d\n%%%%EOF\n" % (next_num, xref_pos))
+
+def combine(args, folder, f_out, out_path):
+    """Gather, sort and preview the images in folder, then write the PDF to f_out."""
+    # Gather files: one directory pass that filters by name, then (if timestamps are
+    # needed) stat the matches on a thread pool (stat is syscall latency; threads
+    # release the GIL).
+    pattern = os.path.join(folder, args.pattern)
+    if os.sep in args.pattern:
+        # the pattern has a directory part: let glob walk it
+        paths = [f for f in glob.iglob(pattern) if is_image(f) and os.path.isfile(f)]
+        to_stat, stat = paths, os.stat
+    else:
+        match_name = re.compile(fnmatch.translate(args.pattern)).match  # compiled once, not per file
+        # as with glob, wildcards don't match a leading dot (e.g. macOS "._page.png" files)
+        hidden_ok = args.pattern.startswith(".")
+        with os.scandir(folder) as it:
+            entries = [de for de in it
+                       if match_name(de.name) and is_image(de.name)
+                       and (hidden_ok or not de.name.startswith("."))
+                       and de.is_file(follow_symlinks=False)]
+        paths = [de.path for de in entries]
+        to_stat, stat = entries, partial(os.DirEntry.stat, follow_symlinks=False)
+    if not paths:
+        print(f"No images matched pattern: {pattern}")
+        sys.exit(1)
+
+    # Parallel columns: sort keys stay apart from the paths, which are only
+    # picked up (in sorted order) once at the end
+    names = [os.path.basename(f).lower() for f in paths]
+
+    # Timestamps are only needed to sort by time or to show the preview
+    need_times = args.sort != "name" or not args.quiet
+    if need_times:
+        with ThreadPoolExecutor(max_workers=STAT_WORKERS) as ex:
+            stats = list(ex.map(stat, to_stat))
+        primary, mtimes = zip(*map(get_times, stats))
+
+    # Sort: a permutation of indices, keyed by a C-level list lookup
+    if args.sort == "name":
+        keys = names
+    elif args.sort == "mtime":
+        keys = list(zip(mtimes, names))
+    else:  # ctime preferred (with mtime as tiebreaker)
+        keys = list(zip(primary, mtimes, names))
+    order = sorted(range(len(paths)), key=keys.__getitem__, reverse=args.reverse)
+    files = [paths[i] for i in order]
+
+    # Preview order (built up and written once; per-line print() is slow for big books)
+    if not args.quiet:
+        strftime, localtime = time.strftime, time.localtime
+        lines = ["Combining images into PDF in this order (first → last):\n"]
+        for n, i in enumerate(order, 1):
+            ts = strftime("%Y-%m-%d %H:%M:%S", localtime(primary[i] if primary[i] else mtimes[i]))
+            lines.append(f"{n:4d}. {os.path.basename(paths[i])}  ({ts})\n")
+        sys.stdout.write("".join(lines))
+
+    print(f"\nWriting PDF → {out_path}")
+
+    # PNG/JPEG/CCITT-G4 TIFF: copy the compressed streams straight into the PDF.
+    # Anything else (other TIFFs, palette/alpha PNG, ...) goes through img2pdf, which
+    # also embeds without recompressing where it can. A header pre-pass picks img2pdf
+    # up front for most such batches, before anything is read in full or written.
+    # Image files are read by --workers threads ahead of the page being assembled.
+    with ThreadPoolExecutor(max_workers=STAT_WORKERS) as ex:
+        blocked = next((f for f, ok in zip(files, ex.map(can_embed, files)) if not ok), None)
+    if blocked is not None:
+        print(f"Direct embed not possible for {os.path.basename(blocked)}; using img2pdf.")
+    else:
+        chunks = read_ahead(files, args.workers)
+        try:
+            write_pdf_direct(chunks, f_out)
+            return
+        except UnsupportedImage as e:
+            print(f"Direct embed not possible ({e}); using img2pdf.")
+            f_out.seek(0)
+            f_out.truncate()
+        finally:
+            chunks.close()
+
+    chunks = read_ahead(files, args.workers)
+    try:
+        img2pdf.convert([NextChunk(chunks) for _ in files], outputstream=f_out)
+    finally:
+        chunks.close()
 
 def main():
     p = argparse.ArgumentParser(
@@ -27,7 +407,8 @@ def main():
     p.add_argument(
         "--pattern",
         default="page_*.png",
-        help="Glob pattern for images (default: page_*.png)",
+        help="Glob pattern for images, relative to the folder; as with glob, wildcards "
+             "skip dot-files unless the pattern starts with '.' (default: page_*.png)",
     )
     p.add_argument(
         "--out",
@@ -45,43 +426,45 @@ def main():
         action="store_true",
         help="Reverse order (newest first). Default is oldest first.",
     )
+    p.add_argument(
+        "--quiet",
+        action="store_true",
+        help="Don't print the page order preview.",
+    )
+    p.add_argument(
+        "--workers",
+        type=int,
+        default=4,
+        help="Threads reading images ahead of PDF assembly (default: 4)",
+    )
     args = p.parse_args()
+    if args.workers < 1:
+        p.error("--workers must be at least 1")
 
     folder = os.path.abspath(args.folder)
     if not os.path.isdir(folder):
         print(f"Error: not a directory: {folder}")
         sys.exit(1)
 
-    # Gather files
-    pattern = os.path.join(folder, args.pattern)
-    files = [f for f in glob.glob(pattern) if is_image(f)]
-    if not files:
-        print(f"No images matched pattern: {pattern}")
-        sys.exit(1)
-
-    # Sort
-    if args.sort == "name":
-        files.sort(key=lambda x: os.path.basename(x).lower(), reverse=args.reverse)
-    elif args.sort == "mtime":
-        files.sort(key=lambda x: (os.path.getmtime(x), os.path.basename(x).lower()),
-                   reverse=args.reverse)
-    else:  # ctime preferred (with mtime as tiebreaker)
-        files.sort(key=lambda x: (*get_times(x), os.path.basename(x).lower()),
-                   reverse=args.reverse)
-
-    # Preview order
-    print("Combining images into PDF in this order (first → last):")
-    for i, f in enumerate(files, 1):
-        t_primary, t_secondary = get_times(f)
-        ts = datetime.fromtimestamp(t_primary if t_primary else t_secondary)
-        print(f"{i:4d}. {os.path.basename(f)}  ({ts})")
-
+    # Open the output before any other work so an unwritable destination fails fast.
+    # Pages go to a temp file that is renamed into place only once the PDF is complete.
     out_path = os.path.join(folder, args.out)
-    print(f"\nWriting PDF → {out_path}")
-
-    # Use img2pdf for efficient, high-quality, non-recompressed PDF
-    with open(out_path, "wb") as f_out:
-        f_out.write(img2pdf.convert(files))
+    tmp_path = out_path + ".tmp"
+    try:
+        f_out = open(tmp_path, "wb")
+    except OSError as e:
+        print(f"Error: cannot write {out_path}: {e}")
+        sys.exit(1)
+    try:
+        with f_out:
+            combine(args, folder, f_out, out_path)
+        os.replace(tmp_path, out_path)
+    except BaseException:
+        try:
+            os.unlink(tmp_path)
+        except OSError:
+            pass
+        raise
 
     print("Done ✅")
 